@@ -15,8 +15,10 @@
 """A Contextual Logistic Bandit environment.
 """
 
+from functools import cached_property
 
 import numpy as np
+from scipy.special import expit
 from rlba.types import (
     Array,
     ArraySpec,
@@ -26,31 +28,35 @@ from rlba.types import (
     NestedDiscreteArraySpec,
 )
 
+# Maximum number of contexts drawn from the generator at a time.
+_CONTEXT_BUFFER_SIZE = 4096
+
 
 class ContextualLogisticBandit:
     """This class creates a contextual logistic bandit environment."""
 
-    def __init__(self, n_actions, n_contexts, dim, seed, sigma_p=1):
+    def __init__(self, n_actions, n_contexts, dim, seed, sigma_p=1,
+                 dtype=np.float32):
         self._n_actions = n_actions
         self._n_contexts = n_contexts
         self._dim = dim
         self._sigma_p = sigma_p
         self._sigma_p_squared = sigma_p**2
-        self._theta = sigma_p * np.random.randn(dim)
+        self._rng = np.random.default_rng(seed)
+        self._dtype = np.dtype(dtype)
+        self._theta = self._rng.standard_normal(dim, dtype=self._dtype)
+        self._theta *= sigma_p
 
         # Matrix of Phi_{S,A}
-        feature = np.random.randn(n_contexts, n_actions, dim)
-        self._feature = feature/np.linalg.norm(feature, axis=-1, keepdims=True)
+        feature = self._rng.standard_normal((n_contexts, n_actions, dim),
+                                            dtype=self._dtype)
+        norms = np.linalg.norm(feature, axis=-1, keepdims=True)
+        self._feature = np.divide(feature, norms, out=feature)
 
-        exp_logits = np.exp(np.tensordot(self._feature,
-                                         self._theta, axes=([-1], [0])))
+        logits = self._feature.reshape(-1, dim) @ self._theta
 
         # Reward Probabilities for each (S,A)
-        self._rewards = exp_logits/(1 + exp_logits)
-        # Maximum Reward for each context S
-        self._values = np.max(self._rewards, axis=1, keepdims=True)
-        # Matrix of Regrets
-        self._regrets = self._values - self._rewards
+        self._rewards = expit(logits.reshape(n_contexts, n_actions))
 
         self._action_spec = DiscreteArraySpec(n_actions, name="action spec")
         self._observation_spec: ArraySpec = BoundedArraySpec(
@@ -60,20 +66,55 @@ class ContextualLogisticBandit:
             maximum=n_contexts,
             name="observation spec",
         )
-        self._rng = np.random.default_rng(seed)
+        self._obs = np.empty(2, dtype=int)
+        # The block size starts at one and doubles on each refill, so that
+        # construction does not pay for a full block of draws.
+        self._context_buffer = []
+        self._context_buffer_index = 0
+        self._context_block_size = 1
         self._reset_context()
         self._prev_context = None
 
+    # The tables below are only needed for evaluation, so they are computed on
+    # first access rather than in the constructor.
+
+    @cached_property
+    def _values(self) -> Array:
+        """Maximum Reward for each context S."""
+        return self._rewards.max(axis=1, keepdims=True)
+
+    @cached_property
+    def _optimal_actions(self) -> Array:
+        """Optimal action for each context S."""
+        return self._rewards.argmax(axis=1)
+
+    @cached_property
+    def _regrets(self) -> Array:
+        """Matrix of Regrets."""
+        regrets = np.empty_like(self._rewards)
+        np.subtract(self._values, self._rewards, out=regrets)
+        return regrets
+
     def _reset_context(self):
         """This function resets the context. For internal use only."""
-        self._context = self._rng.integers(low=0, high=self._n_contexts)
-        self._context_features = self._feature[self._context, :, :]
+        if self._context_buffer_index >= len(self._context_buffer):
+            # Kept as a list so that contexts are plain Python ints.
+            self._context_buffer = self._rng.integers(
+                low=0, high=self._n_contexts,
+                size=self._context_block_size).tolist()
+            self._context_buffer_index = 0
+            self._context_block_size = min(2 * self._context_block_size,
+                                           _CONTEXT_BUFFER_SIZE)
+        self._context = self._context_buffer[self._context_buffer_index]
+        self._context_buffer_index += 1
 
     def expected_reward(self, action):
-        return self._rewards[self._prev_context, action]
+        # Returned as a Python float so evaluation metrics accumulate in double
+        # precision even when the tables are stored in float32.
+        return float(self._rewards[self._prev_context, action])
 
     def optimal_expected_reward(self):
-        return np.max(self._rewards[self._prev_context])
+        return float(self._values[self._prev_context, 0])
 
     def _get_context(self):
         """ This function returns the current context and the associated feature. For internal use only.
@@ -97,6 +138,45 @@ class ContextualLogisticBandit:
         """
         return self._regrets
 
+    def regret(self, context_index, action):
+        """ Returns the expected regret of taking action in context
+            context_index.
+            Args:
+                context_index: integer index, or integer array of indices, of
+                    contexts.
+                action: integer index, or integer array of indices, of actions.
+
+            Returns:
+                A Python float for scalar indices, otherwise a float64 array.
+
+            Raises:
+                ValueError: if a context or action index is out of range.
+
+            This method is for evaluation purposes only. It should not be used
+            as part of agent/environment interaction.
+        """
+        if (isinstance(context_index, (int, np.integer))
+                and isinstance(action, (int, np.integer))):
+            if not (0 <= context_index < self._n_contexts
+                    and 0 <= action < self._n_actions):
+                raise ValueError("context_index or action is out of range.")
+            return float(self._regrets[context_index, action])
+
+        context_index = np.asarray(context_index)
+        action = np.asarray(action)
+        if (np.any((context_index < 0) | (context_index >= self._n_contexts))
+                or np.any((action < 0) | (action >= self._n_actions))):
+            raise ValueError("context_index or action is out of range.")
+        return self._regrets[context_index, action].astype(np.float64)
+
+    def output_optimal_actions(self) -> Array:
+        """ Returns a num_context array of the optimal action for each context
+
+            This method is for evaluation purposes only. It should not be used
+            as part of agent/environment interaction.
+        """
+        return self._optimal_actions
+
     def get_features(self, context_index) -> Array:
         """ Returns the features for each action associated with context context_index.
             Args:
@@ -104,6 +184,15 @@ class ContextualLogisticBandit:
         """
         return self._feature[context_index, :, :]
 
+    def context_logits(self, context_index, theta) -> Array:
+        """ Returns the logits of every action in context context_index under
+            theta.
+            Args:
+                context_index: the integer index of the context.
+                theta: a length dim parameter vector, e.g. an agent's estimate.
+        """
+        return self._feature[context_index] @ theta
+
     def step(self, action: int) -> Array:
         """ This function simulates for one step.
             Args:
@@ -115,14 +204,62 @@ class ContextualLogisticBandit:
                 specification returned by 'observation_spec()'
                 Integer array [reward, context_index]
         """
-        assert action >= 0 and action < self._n_actions
+        # Negative indices would silently wrap around, so keep the bounds check;
+        # it is compiled away when running with -O.
+        assert 0 <= action < self._n_actions
 
-        mean_reward = self._rewards[self._context, action]
-        reward = self._rng.binomial(1, mean_reward)
-        self._prev_context = self._get_context()
+        context = self._context
+        reward = int(self._rng.random() < self._rewards[context, action])
+        self._prev_context = context
         self._reset_context()
-        context_index = self._get_context()
-        return np.array([reward, context_index]).astype(int)
+        self._obs[0] = reward
+        self._obs[1] = self._context
+        # Callers may hold on to observations, so do not hand out the buffer.
+        return self._obs.copy()
+
+    def step_batch(self, actions: Array) -> Array:
+        """ Simulates len(actions) consecutive steps in one vectorized call.
+            Args:
+                actions: 1-D integer array; actions[i] is executed at the i-th
+                    step.
+
+            Returns:
+                An (len(actions), 2) Numpy Array of ints whose i-th row is a
+                [reward, context_index] observation with the same distribution
+                as the one step(actions[i]) would return. The random draws are
+                made in a different order, so for a fixed seed the sampled
+                sequence differs from that of len(actions) calls to step().
+
+            Raises:
+                ValueError: if actions is not 1-D.
+                TypeError: if actions is not an integer array.
+                ValueError: if an action is out of range.
+        """
+        actions = np.asarray(actions)
+        if actions.ndim != 1:
+            raise ValueError("actions must be a 1-D array.")
+        n_steps = actions.size
+        if n_steps and not np.issubdtype(actions.dtype, np.integer):
+            raise TypeError("actions must be an array of integers.")
+        if np.any((actions < 0) | (actions >= self._n_actions)):
+            raise ValueError("actions must be in [0, n_actions).")
+        if n_steps == 0:
+            return np.empty((0, 2), dtype=int)
+
+        next_contexts = self._rng.integers(low=0, high=self._n_contexts,
+                                           size=n_steps)
+        contexts = np.empty(n_steps, dtype=int)
+        contexts[0] = self._context
+        contexts[1:] = next_contexts[:-1]
+
+        obs = np.empty((n_steps, 2), dtype=int)
+        mean_rewards = self._rewards[contexts, actions]
+        obs[:, 0] = self._rng.random(n_steps) < mean_rewards
+        obs[:, 1] = next_contexts
+
+        self._prev_context = int(contexts[-1])
+        self._context = int(next_contexts[-1])
+        return obs
 
     @property
     def observation_spec(self) -> NestedArraySpec:
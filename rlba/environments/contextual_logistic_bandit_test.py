@@ -14,11 +14,13 @@
 
 """Tests for multiple logistic environment."""
 
+from unittest import mock
 
 from absl.testing import absltest
 
 
 import numpy as np
+from rlba.environments import contextual_logistic_bandit
 from rlba.environments.contextual_logistic_bandit import ContextualLogisticBandit
 from rlba.types import ArraySpec, DiscreteArraySpec
 
@@ -42,6 +44,30 @@ class ContextualLogisticBanditTest(absltest.TestCase):
         self.assertEqual(env._rewards.shape, (n_contexts, n_actions))
         self.assertEqual(env._values.shape, (n_contexts, 1))
         self.assertEqual(env._feature.shape, (n_contexts, n_actions, dim))
+        np.testing.assert_allclose(np.linalg.norm(env._feature, axis=-1), 1.,
+                                   rtol=1e-6)
+
+    def test_dtype(self):
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7, seed=0)
+        self.assertEqual(env._feature.dtype, np.float32)
+        self.assertEqual(env._rewards.dtype, np.float32)
+        self.assertEqual(env._regrets.dtype, np.float32)
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7, seed=0,
+                                       dtype=np.float64)
+        self.assertEqual(env._feature.dtype, np.float64)
+        self.assertEqual(env._rewards.dtype, np.float64)
+
+    def test_large_logits_are_finite(self):
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7, seed=0,
+                                       sigma_p=1e3)
+        self.assertTrue(np.all(np.isfinite(env._rewards)))
+        self.assertTrue(np.all((env._rewards >= 0) & (env._rewards <= 1)))
+
+    def test_evaluation_rewards_are_python_floats(self):
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7, seed=0)
+        env.step(0)
+        self.assertIs(type(env.expected_reward(0)), float)
+        self.assertIs(type(env.optimal_expected_reward()), float)
 
     def test_unbiased_arm(self):
         n_actions = 5
@@ -58,6 +84,118 @@ class ContextualLogisticBanditTest(absltest.TestCase):
         obs = np.array([env.step(0)[0] for i in range(1000)])
         self.assertLess(np.abs(np.sum(obs) / obs.size - reward_probs[0,0]), 0.05)
 
+    def test_optimal_expected_reward(self):
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7, seed=0)
+        env.step(0)
+        context = env._prev_context
+        self.assertAlmostEqual(env.optimal_expected_reward(),
+                               np.max(env.output_means()[context]))
+        self.assertEqual(env.output_optimal_actions()[context],
+                         np.argmax(env.output_means()[context]))
+
+    def test_evaluation_tables_are_lazy(self):
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7, seed=0)
+        self.assertNotIn("_regrets", vars(env))
+        regrets = env.output_regrets()
+        self.assertIs(env.output_regrets(), regrets)
+        np.testing.assert_allclose(regrets, env._values - env._rewards)
+
+    def test_regret(self):
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7, seed=0)
+        regrets = env.output_regrets()
+        self.assertEqual(env.regret(2, 3), regrets[2, 3])
+        self.assertIs(type(env.regret(2, 3)), float)
+        contexts = np.array([0, 1, 2, 2])
+        actions = np.array([4, 0, 1, 3])
+        np.testing.assert_array_equal(env.regret(contexts, actions),
+                                      regrets[contexts, actions])
+        self.assertEqual(env.regret(contexts, actions).dtype, np.float64)
+        for context_index, action in [(0, 5), (1, -1), (3, 0), (-1, 0)]:
+            with self.assertRaises(ValueError):
+                env.regret(context_index, action)
+        with self.assertRaises(ValueError):
+            env.regret(np.array([0, 1]), np.array([0, 5]))
+
+    def test_context_logits(self):
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7, seed=0)
+        self.assertTrue(env._feature.flags.c_contiguous)
+        logits = env.context_logits(1, env._theta)
+        self.assertEqual(logits.shape, (5,))
+        np.testing.assert_allclose(1 / (1 + np.exp(-logits)), env._rewards[1],
+                                   rtol=1e-5)
+
+    @mock.patch.object(contextual_logistic_bandit, "_CONTEXT_BUFFER_SIZE", 4)
+    def test_context_buffer_refill(self):
+        n_actions, n_contexts, dim, n_steps = 5, 3, 7, 12
+        env = ContextualLogisticBandit(n_actions=n_actions,
+                                       n_contexts=n_contexts,
+                                       dim=dim,
+                                       seed=0)
+        contexts = []
+        for _ in range(n_steps):
+            env.step(0)
+            contexts.append(env._get_context())
+        for context in contexts:
+            self.assertIs(type(context), int)
+            self.assertTrue(0 <= context < n_contexts)
+
+        # Replay the generator draw for draw: blocks of 1, 2, 4, 4, ...
+        # contexts are interleaved with one uniform per step.
+        rng = np.random.default_rng(0)
+        rng.standard_normal(dim, dtype=np.float32)
+        rng.standard_normal((n_contexts, n_actions, dim), dtype=np.float32)
+        block_size = 1
+        buffer = rng.integers(0, n_contexts, size=block_size).tolist()
+        buffer.pop(0)
+        expected = []
+        for _ in range(n_steps):
+            rng.random()
+            if not buffer:
+                block_size = min(2 * block_size, 4)
+                buffer = rng.integers(0, n_contexts, size=block_size).tolist()
+            expected.append(buffer.pop(0))
+        self.assertEqual(contexts, expected)
+
+    def test_seed_determinism(self):
+        env1 = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7,
+                                        seed=1)
+        env2 = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7,
+                                        seed=1)
+        np.testing.assert_array_equal(env1._feature, env2._feature)
+        np.testing.assert_array_equal(env1._rewards, env2._rewards)
+        for _ in range(10):
+            np.testing.assert_array_equal(env1.step(0), env2.step(0))
+
+    def test_step_batch(self):
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=1, dim=7, seed=0)
+        obs = env.step_batch(np.zeros(1000, dtype=int))
+        self.assertEqual(obs.shape, (1000, 2))
+        np.testing.assert_array_equal(obs[:, 1], 0)
+        self.assertLess(np.abs(np.mean(obs[:, 0]) - env._rewards[0, 0]), 0.05)
+
+        env = ContextualLogisticBandit(n_actions=5, n_contexts=3, dim=7, seed=0)
+        obs = env.step_batch(np.arange(5))
+        self.assertEqual(env._get_context(), obs[-1, 1])
+        self.assertEqual(env.step_batch([]).shape, (0, 2))
+        with self.assertRaises(TypeError):
+            env.step_batch([1.7, 2.2])
+        with self.assertRaises(ValueError):
+            env.step_batch(np.zeros((2, 2), dtype=int))
+        for actions in ([0, 5], [-1, 0]):
+            with self.assertRaises(ValueError):
+                env.step_batch(actions)
+
+        # step() keeps drawing from its context buffer after a batch.
+        env.step_batch(np.arange(5))
+        for _ in range(10):
+            context = env.step(0)[1]
+            self.assertTrue(0 <= context < 3)
+            self.assertIs(type(env._get_context()), int)
+        self.assertIs(type(env._get_context()), int)
+        env.step(0)
+        self.assertIs(type(env._get_context()), int)
+        self.assertIs(type(env._prev_context), int)
+
 
 if __name__ == "__main__":
     absltest.main()
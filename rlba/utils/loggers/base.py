@@ -62,7 +62,19 @@ class NoOpLogger:
         pass
 
 
+# Leaf types that never need conversion; checked by exact type for speed.
+_NUMPY_NATIVE_TYPES = frozenset(
+    [np.ndarray, int, float, bool, complex, str, bytes, type(None)]
+)
+
+
+def _is_numpy_native(value: Any) -> bool:
+    return type(value) in _NUMPY_NATIVE_TYPES or isinstance(value, np.generic)
+
+
 def tensor_to_numpy(value: Any):
+    if _is_numpy_native(value):
+        return value
     if hasattr(value, "numpy"):
         return value.numpy()  # tf.Tensor (TF2).
     if hasattr(value, "device_buffer"):
@@ -74,7 +86,8 @@ def to_numpy(values: Any):
     """Converts tensors in a nested structure to numpy.
 
     Converts tensors from TensorFlow to Numpy if needed without importing TF
-    dependency.
+    dependency. If every leaf is already a numpy or Python value, `values` is
+    returned as is rather than rebuilt.
 
     Args:
       values: nested structure with numpy and / or TF tensors.
@@ -82,4 +95,8 @@ def to_numpy(values: Any):
     Returns:
       Same nested structure as values, but with numpy tensors.
     """
+    if _is_numpy_native(values):
+        return values
+    if all(_is_numpy_native(leaf) for leaf in tree.flatten(values)):
+        return values
     return tree.map_structure(tensor_to_numpy, values)
@@ -33,6 +33,20 @@ class BaseTest(absltest.TestCase):
         expected = {"x": np.zeros(shape=(32,))}
         np.testing.assert_array_equal(output["x"], expected["x"])
 
+    def test_native_values_passthrough(self):
+        data = {"x": np.zeros(shape=(32,)), "y": 1.0, "z": [np.float32(2.0)]}
+        self.assertIs(base.to_numpy(data), data)
+
+    def test_tensor_like_conversion(self):
+        class FakeTensor:
+            def numpy(self):
+                return np.ones(shape=(4,))
+
+        data = {"x": FakeTensor(), "y": 1}
+        output = base.to_numpy(data)
+        np.testing.assert_array_equal(output["x"], np.ones(shape=(4,)))
+        self.assertEqual(output["y"], 1)
+
 
 if __name__ == "__main__":
     absltest.main()